@@ -132,8 +132,16 @@ _activation_dict = {'crelu':CReLU,
                     'csoftmax':complex_softmax,
                     'crsigmoid':complex_real_sigmoid}
 
+# Activations applying the same elementwise function to the real and imaginary parts,
+# which are computed in a single pass over the complex tensor without splitting it.
+_split_free_activation_dict = {'crelu':tf.nn.relu,
+                               'clrelu':tf.nn.leaky_relu,
+                               'ctanh':tf.nn.tanh}
+
 def activation(inputs, key, input_form='complex'):
     if input_form == 'complex':  # ((,...,) + (input_dim*2=n_channels,))
+        if key in _split_free_activation_dict:
+            return _split_free_activation_dict[key](inputs)
         inputs = complex_to_real_imag(inputs)
 
     real, imag = inputs
@@ -151,9 +151,50 @@ def complex_standardization(input_centred, Vrr, Vii, Vri,
     return output
 
 
+def variance_standardization(input_centred, Vrr, Vii,
+                             layernorm=False, axis=-1):
+    """Complex Standardization of input by the variance of its modulus
+
+    Unlike `complex_standardization`, the input is not whitened:
+    both its real and imaginary parts are divided by the same scalar,
+    which avoids the inverse square root of the 2x2 covariance matrix.
+
+    Arguments:
+        input_centred -- Input Tensor
+        Vrr -- Real component of covariance matrix V
+        Vii -- Imaginary component of covariance matrix V
+
+    Keyword Arguments:
+        layernorm {bool} -- Normalization (default: {False})
+        axis {int} -- Axis for Standardization (default: {-1})
+
+    Returns:
+        Complex standardized input
+    """
+
+    ndim = K.ndim(input_centred)
+    input_dim = K.shape(input_centred)[axis] // 2
+    variances_broadcast = [1] * ndim
+    variances_broadcast[axis] = input_dim
+    if layernorm:
+        variances_broadcast[0] = K.shape(input_centred)[0]
+
+    # Vrr + Vii = E(|x - mu|^2). Its half is used so that the real and
+    # imaginary parts get unit variances as with the whitening, and both
+    # standardizations agree when these parts are uncorrelated and have
+    # equal variances.
+    inverse_std = 1.0 / K.sqrt((Vrr + Vii) / 2)
+    broadcast_inverse_std = K.reshape(inverse_std, variances_broadcast)
+
+    cat_inverse_std = K.concatenate([broadcast_inverse_std, broadcast_inverse_std], axis=axis)
+
+    return cat_inverse_std * input_centred
+
+
 def ComplexBN(input_centred, Vrr, Vii, Vri, beta,
               gamma_rr, gamma_ri, gamma_ii, scale=True,
-              center=True, layernorm=False, axis=-1):
+              center=True, layernorm=False, axis=-1,
+              bn_kind='covariance'):
     """Complex Batch Normalization
 
     Arguments:
@@ -171,6 +212,9 @@ def ComplexBN(input_centred, Vrr, Vii, Vri, beta,
         center {bool} -- Mean-shift correction (default: {True})
         layernorm {bool} -- Normalization (default: {False})
         axis {int} -- Axis for Standardization (default: {-1})
+        bn_kind {str} -- 'covariance' to whiten the input, or 'variance'
+                         to only divide it by the standard deviation of
+                         its modulus (default: {'covariance'})
 
     Raises:
         ValueError: Dimonsional mismatch
@@ -189,11 +233,18 @@ def ComplexBN(input_centred, Vrr, Vii, Vri, beta,
         broadcast_beta_shape[axis] = input_dim * 2
 
     if scale:
-        standardized_output = complex_standardization(
-            input_centred, Vrr, Vii, Vri,
-            layernorm,
-            axis=axis
-        )
+        if bn_kind == 'variance':
+            standardized_output = variance_standardization(
+                input_centred, Vrr, Vii,
+                layernorm,
+                axis=axis
+            )
+        else:
+            standardized_output = complex_standardization(
+                input_centred, Vrr, Vii, Vri,
+                layernorm,
+                axis=axis
+            )
 
         # Now we perform th scaling and Shifting of the normalized x using
         # the scaling parameter
@@ -278,6 +329,10 @@ class ComplexBatchNormalization(Layer):
         gamma_regularizer: Optional regularizer for the gamma weights.
         beta_constraint: Optional constraint for the beta weights.
         gamma_constraint: Optional constraint for the gamma weights.
+        bn_kind: One of `"covariance"` (default) or `"variance"`.
+            `"covariance"` whitens each complex unit with the inverse square
+            root of its 2 by 2 covariance matrix. `"variance"` only divides it
+            by the standard deviation of its modulus, which is cheaper.
     # Input shape
         Arbitrary. Use the keyword argument `input_shape`
         (tuple of integers, does not include the samples axis)
@@ -306,8 +361,12 @@ class ComplexBatchNormalization(Layer):
                  beta_constraint=None,
                  gamma_diag_constraint=None,
                  gamma_off_constraint=None,
+                 bn_kind='covariance',
                  **kwargs):
         super(ComplexBatchNormalization, self).__init__(**kwargs)
+        if bn_kind not in {'covariance', 'variance'}:
+            raise ValueError('bn_kind should be either "covariance" or "variance". '
+                             'bn_kind: ' + str(bn_kind) + '.')
         self.supports_masking = True
         self.axis = axis
         self.momentum = momentum
@@ -326,6 +385,7 @@ class ComplexBatchNormalization(Layer):
         self.beta_constraint               = constraints .get(beta_constraint)
         self.gamma_diag_constraint         = constraints .get(gamma_diag_constraint)
         self.gamma_off_constraint          = constraints .get(gamma_off_constraint)
+        self.bn_kind                       = bn_kind
 
     def build(self, input_shape):
         dim = input_shape[self.axis]
@@ -441,10 +501,14 @@ class ComplexBatchNormalization(Layer):
                 axis=reduction_axes
             ) + self.epsilon
             # Vri contains the real and imaginary covariance for each feature map.
-            Vri = K.mean(
-                centred_real * centred_imag,
-                axis=reduction_axes,
-            )
+            # It is not needed to standardize by the variance only.
+            if self.bn_kind == 'variance':
+                Vri = None
+            else:
+                Vri = K.mean(
+                    centred_real * centred_imag,
+                    axis=reduction_axes,
+                )
         elif self.center:
             Vrr = None
             Vii = None
@@ -456,7 +520,7 @@ class ComplexBatchNormalization(Layer):
             input_centred, Vrr, Vii, Vri,
             self.beta, self.gamma_rr, self.gamma_ri,
             self.gamma_ii, self.scale, self.center,
-            axis=self.axis
+            axis=self.axis, bn_kind=self.bn_kind
         )
         if training in {0, False}:
             return input_bn
@@ -467,7 +531,8 @@ class ComplexBatchNormalization(Layer):
             if self.scale:
                 update_list.append(K.moving_average_update(self.moving_Vrr, Vrr, self.momentum))
                 update_list.append(K.moving_average_update(self.moving_Vii, Vii, self.momentum))
-                update_list.append(K.moving_average_update(self.moving_Vri, Vri, self.momentum))
+                if Vri is not None:
+                    update_list.append(K.moving_average_update(self.moving_Vri, Vri, self.momentum))
             self.add_update(update_list, inputs)
 
             def normalize_inference():
@@ -479,7 +544,8 @@ class ComplexBatchNormalization(Layer):
                 return ComplexBN(
                     inference_centred, self.moving_Vrr, self.moving_Vii,
                     self.moving_Vri, self.beta, self.gamma_rr, self.gamma_ri,
-                    self.gamma_ii, self.scale, self.center, axis=self.axis
+                    self.gamma_ii, self.scale, self.center, axis=self.axis,
+                    bn_kind=self.bn_kind
                 )
 
         # Pick the normalized form corresponding to the training phase.
@@ -506,6 +572,7 @@ class ComplexBatchNormalization(Layer):
             'beta_constraint':               constraints .serialize(self.beta_constraint),
             'gamma_diag_constraint':         constraints .serialize(self.gamma_diag_constraint),
             'gamma_off_constraint':          constraints .serialize(self.gamma_off_constraint),
+            'bn_kind':                       self.bn_kind,
         }
         base_config = super(ComplexBatchNormalization, self).get_config()
         return dict(list(base_config.items()) + list(config.items()))
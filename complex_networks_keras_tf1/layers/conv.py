@@ -182,6 +182,10 @@ class _ComplexConv(Layer):
         spectral_parametrization: Boolean, whether or not to use a spectral
             parametrization of the parameters.
         transposed: Boolean, whether or not to use transposed convolution
+        compute_dtype: Optional dtype, e.g. 'float16', the convolution is
+            computed in. The weights are kept in `K.floatx()` and the output
+            is cast back to it, so that only the convolution itself runs in
+            reduced precision (mixed precision).
     """
     def __init__(self,
                  rank,
@@ -212,6 +216,7 @@ class _ComplexConv(Layer):
                  spectral_parametrization=False,
                  transposed=False,
                  epsilon=1e-7,
+                 compute_dtype=None,
                  **kwargs):
         super(_ComplexConv, self).__init__(**kwargs)
         self.rank = rank
@@ -228,6 +233,7 @@ class _ComplexConv(Layer):
         self.spectral_parametrization = spectral_parametrization
         self.transposed = transposed
         self.epsilon = epsilon
+        self.compute_dtype = compute_dtype
         self.kernel_initializer = sanitizedInitGet(kernel_initializer)
         self.bias_initializer = sanitizedInitGet(bias_initializer)
         self.gamma_diag_initializer = sanitizedInitGet(gamma_diag_initializer)
@@ -379,11 +385,10 @@ class _ComplexConv(Layer):
                 2:  K.conv2d,
                 3:  K.conv3d}[self.rank]
 
-        ifftFunc = ifft_func
-
         # processing if the weights are assumed to be represented in the spectral domain
 
         if self.spectral_parametrization:
+            ifftFunc = ifft_func
             if self.rank == 1:
                 f_real = K.permute_dimensions(f_real, (2, 1, 0))
                 f_imag = K.permute_dimensions(f_imag, (2, 1, 0))
@@ -464,7 +469,13 @@ class _ComplexConv(Layer):
         else:
             cat_kernels_4_complex._keras_shape = self.kernel_size + (2 * input_dim, 2 * self.filters)
 
-        output = convFunc(inputs, cat_kernels_4_complex, **convArgs)
+        if self.compute_dtype is not None:
+            output = convFunc(K.cast(inputs, self.compute_dtype),
+                              K.cast(cat_kernels_4_complex, self.compute_dtype),
+                              **convArgs)
+            output = K.cast(output, K.floatx())
+        else:
+            output = convFunc(inputs, cat_kernels_4_complex, **convArgs)
 
         if self.use_bias:
             output = K.bias_add(
@@ -538,6 +549,7 @@ class _ComplexConv(Layer):
             'init_criterion': self.init_criterion,
             'spectral_parametrization': self.spectral_parametrization,
             'transposed': self.transposed,
+            'compute_dtype': self.compute_dtype,
         }
         base_config = super(_ComplexConv, self).get_config()
         return dict(list(base_config.items()) + list(config.items()))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""This module implements the specification shared by the complex valued residual blocks."""
+
+#  Reference:
+#       Allen Goodman, Allen Goodman, Claire McQuin, Hans Gaiser, et al. keras-resnet
+#       https://github.com/broadinstitute/keras-resnet
+
+# pylint:disable=too-few-public-methods
+
+import keras.backend
+
+# The channel axis of the complex feature maps, fixed by the image data format when the package is imported.
+_CHANNEL_AXIS = -1 if keras.backend.image_data_format() == 'channels_last' else 1
+
+# The data format of the convolutions, so that they always agree with the batch normalizations on `_CHANNEL_AXIS`.
+_DATA_FORMAT = 'channels_last' if _CHANNEL_AXIS == -1 else 'channels_first'
+
+_BLOCK_CHARS = tuple(chr(ord('a') + i) for i in range(26))
+
+
+def _block_char(block, numerical):
+    """The name of a block within its stage, e.g. 'b1' for a numerical name or 'c' otherwise."""
+    return f'b{block}' if numerical and block > 0 else _BLOCK_CHARS[block]
+
+
+class BlockSpec:
+    """
+    The stride and layer names of a residual block, computed once when the block is created.
+
+    :param stage: int, representing the stage of this block (starting from 0)
+
+    :param block: int, representing this block (starting from 0)
+
+    :param numerical_name: bool, if true, uses numbers to represent blocks instead of chars
+
+    :param stride: int, representing the stride used in the shortcut and the first conv layer,
+        default derives stride from block id
+
+    :param activation: str, the activation of convolution layer in residual blocks
+
+    Usage:
+
+        >>> from complex_networks_keras_tf1.models.block_spec import BlockSpec
+
+        >>> spec = BlockSpec(stage=1, block=0)
+
+        >>> spec.names['conv_a']
+        'res3a_branch2a'
+    """
+    __slots__ = ('stride', 'stage_char', 'block_char', 'prefix', 'names')
+
+    def __init__(self, stage=0, block=0, numerical_name=False, stride=None, activation='crelu'):
+        if stride is None:
+            if block != 0 or stage == 0:
+                stride = 1
+            else:
+                stride = 2
+
+        self.stride = stride
+
+        self.block_char = _block_char(block, numerical_name)
+
+        self.stage_char = str(stage + 2)
+
+        prefix = f'{self.stage_char}{self.block_char}'
+
+        self.prefix = prefix
+
+        self.names = {'pad_a': f'padding{prefix}_branch2a',
+                      'conv_a': f'res{prefix}_branch2a',
+                      'bn_a': f'bn{prefix}_branch2a',
+                      'act_a': f'res{prefix}_branch2a_{activation}',
+                      'conv_b': f'res{prefix}_branch2b',
+                      'bn_b': f'bn{prefix}_branch2b',
+                      'act_b': f'res{prefix}_branch2b_{activation}',
+                      'conv_c': f'res{prefix}_branch2c',
+                      'bn_c': f'bn{prefix}_branch2c',
+                      'conv_1': f'res{prefix}_branch1',
+                      'bn_1': f'bn{prefix}_branch1',
+                      'add': f'res{prefix}',
+                      'act': f'res{prefix}_{activation}'}
+
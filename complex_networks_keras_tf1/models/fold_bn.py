@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""This module folds complex valued batch normalization layers into the preceding convolution layers."""
+
+# pylint:disable=invalid-name, protected-access
+
+import numpy as np
+import keras
+import keras.backend as K
+from keras.utils.generic_utils import to_list
+
+from ..layers.bn import ComplexBatchNormalization
+from ..layers.conv import _ComplexConv
+
+_backend_conv_dict = {1: K.conv1d,
+                      2: K.conv2d,
+                      3: K.conv3d}
+
+
+class _MixedPrecisionConv:
+    """
+    Mixin of a folded real convolution computed in `compute_dtype`, as `_ComplexConv` does: the input and the
+    kernel are cast to `compute_dtype` and the output is cast back to `K.floatx()` before adding the bias.
+
+    :param compute_dtype: str, the dtype the convolution is computed in, e.g. 'float16'
+    """
+    def __init__(self, *args, compute_dtype='float16', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compute_dtype = compute_dtype
+
+    def call(self, inputs):
+        strides, dilation_rate = self.strides, self.dilation_rate
+        if self.rank == 1:
+            strides, dilation_rate = strides[0], dilation_rate[0]
+        outputs = _backend_conv_dict[self.rank](K.cast(inputs, self.compute_dtype),
+                                                K.cast(self.kernel, self.compute_dtype),
+                                                strides=strides,
+                                                padding=self.padding,
+                                                data_format=self.data_format,
+                                                dilation_rate=dilation_rate)
+        outputs = K.cast(outputs, K.floatx())
+        if self.use_bias:
+            outputs = K.bias_add(outputs, self.bias, data_format=self.data_format)
+        if self.activation is not None:
+            outputs = self.activation(outputs)
+        return outputs
+
+    def get_config(self):
+        config = super().get_config()
+        config['compute_dtype'] = self.compute_dtype
+        return config
+
+
+class MixedPrecisionConv1D(_MixedPrecisionConv, keras.layers.Conv1D):
+    """`keras.layers.Conv1D` computed in `compute_dtype`."""
+
+
+class MixedPrecisionConv2D(_MixedPrecisionConv, keras.layers.Conv2D):
+    """`keras.layers.Conv2D` computed in `compute_dtype`."""
+
+
+class MixedPrecisionConv3D(_MixedPrecisionConv, keras.layers.Conv3D):
+    """`keras.layers.Conv3D` computed in `compute_dtype`."""
+
+
+_real_conv_dict = {1: keras.layers.Conv1D,
+                   2: keras.layers.Conv2D,
+                   3: keras.layers.Conv3D}
+
+_mixed_precision_conv_dict = {1: MixedPrecisionConv1D,
+                              2: MixedPrecisionConv2D,
+                              3: MixedPrecisionConv3D}
+
+
+def _is_foldable(conv, bn):
+    """Whether `bn` can be folded into `conv`, i.e. `bn` is the only consumer of the plain convolution output."""
+    if not isinstance(conv, _ComplexConv) or not isinstance(bn, ComplexBatchNormalization):
+        return False
+    if conv.transposed or conv.normalize_weight or conv.spectral_parametrization or conv.activation is not None:
+        return False
+    if len(conv._inbound_nodes) != 1 or len(conv._outbound_nodes) != 1 or len(bn._inbound_nodes) != 1:
+        return False
+    ndim = conv.rank + 2
+    channel_axis = 1 if conv.data_format == 'channels_first' else -1
+    return bn.axis % ndim == channel_axis % ndim
+
+
+def fold_weights(kernel, bias, moving_mean, beta, moving_variances, gammas, bn_kind='covariance'):
+    """
+    Fold the inference transformation of a complex batch normalization into a complex convolution.
+
+    The complex batch normalization applies a 2 by 2 real matrix M = Gamma . V^(-1/2) to the real and
+    imaginary parts of each complex feature map. M is in general not a complex scalar, so the folded
+    convolution is the real convolution over the concatenated real and imaginary feature maps.
+
+    :param kernel: numpy array, the complex kernel, of shape `kernel_size + (input_dim, 2 * filters)`
+
+    :param bias: numpy array or None, the bias of the complex convolution
+
+    :param moving_mean: numpy array or None, the moving mean of the batch normalization (`center=True`)
+
+    :param beta: numpy array or None, the shift parameter of the batch normalization (`center=True`)
+
+    :param moving_variances: tuple or None, moving Vrr, Vii and Vri of the batch normalization (`scale=True`)
+
+    :param gammas: tuple or None, gamma_rr, gamma_ri and gamma_ii of the batch normalization (`scale=True`)
+
+    :param bn_kind: str, the `bn_kind` of the batch normalization
+
+    :return: tuple, the kernel of shape `kernel_size + (2 * input_dim, 2 * filters)` and the bias of shape
+        `(2 * filters,)` of the equivalent real convolution
+    """
+    filters = kernel.shape[-1] // 2
+    f_real = kernel[..., :filters]
+    f_imag = kernel[..., filters:]
+    # Same layout as the concatenated kernel built in `_ComplexConv.call`.
+    kernel_4_real = np.concatenate([f_real, -f_imag], axis=-2)
+    kernel_4_imag = np.concatenate([f_imag, f_real], axis=-2)
+
+    if bias is None:
+        bias = np.zeros(2 * filters, dtype=kernel.dtype)
+    if moving_mean is not None:
+        bias = bias - moving_mean
+
+    if moving_variances is not None:
+        Vrr, Vii, Vri = moving_variances
+        gamma_rr, gamma_ri, gamma_ii = gammas
+        if bn_kind == 'variance':
+            # See `variance_standardization`.
+            Wrr = Wii = 1.0 / np.sqrt((Vrr + Vii) / 2)
+            Wri = np.zeros_like(Vri)
+        else:
+            # Inverse square root of the covariance matrix, see `complex_standardization`.
+            s = np.sqrt(Vrr * Vii - Vri ** 2)
+            t = np.sqrt(Vrr + Vii + 2 * s)
+            inverse_st = 1.0 / (s * t)
+            Wrr = (Vii + s) * inverse_st
+            Wii = (Vrr + s) * inverse_st
+            Wri = -Vri * inverse_st
+        # M = Gamma . W
+        Mrr = gamma_rr * Wrr + gamma_ri * Wri
+        Mri = gamma_rr * Wri + gamma_ri * Wii
+        Mir = gamma_ri * Wrr + gamma_ii * Wri
+        Mii = gamma_ri * Wri + gamma_ii * Wii
+    else:
+        Mrr = Mii = np.ones(filters, dtype=kernel.dtype)
+        Mri = Mir = np.zeros(filters, dtype=kernel.dtype)
+
+    folded_kernel = np.concatenate([Mrr * kernel_4_real + Mri * kernel_4_imag,
+                                    Mir * kernel_4_real + Mii * kernel_4_imag], axis=-1)
+
+    bias_real = bias[:filters]
+    bias_imag = bias[filters:]
+    folded_bias = np.concatenate([Mrr * bias_real + Mri * bias_imag,
+                                  Mir * bias_real + Mii * bias_imag])
+    if beta is not None:
+        folded_bias = folded_bias + beta
+
+    return folded_kernel, folded_bias
+
+
+def _real_conv(conv):
+    """Build the real convolution layer replacing `conv` in the folded model, in the same `compute_dtype`."""
+    kwargs = dict(strides=conv.strides,
+                  padding=conv.padding,
+                  data_format=conv.data_format,
+                  dilation_rate=conv.dilation_rate,
+                  use_bias=True,
+                  name=conv.name)
+    if conv.compute_dtype is None:
+        return _real_conv_dict[conv.rank](2 * conv.filters, conv.kernel_size, **kwargs)
+    return _mixed_precision_conv_dict[conv.rank](2 * conv.filters, conv.kernel_size,
+                                                 compute_dtype=conv.compute_dtype, **kwargs)
+
+
+def conv_bn(conv, bn, inference_mode=False):
+    """
+    The complex convolution `conv` followed by the batch normalization `bn`, or, in inference mode, directly the
+    real convolution they fold into (see `fold_bn_into_conv`). The folded weights are not computed: they are
+    loaded from a file saved from a folded model.
+
+    :param conv: `_ComplexConv`, a complex convolution layer, not yet called
+
+    :param bn: `ComplexBatchNormalization`, the batch normalization following `conv`, not yet called
+
+    :param inference_mode: bool, if true, returns the real convolution replacing `conv` and `bn`
+
+    :return: callable applying the layers to a tensor
+    """
+    if inference_mode:
+        return _real_conv(conv)
+    return lambda inputs: bn(conv(inputs))
+
+
+def _folded_weights(conv, bn):
+    """Read the current weights of `conv` and `bn` and fold them."""
+    bias = K.get_value(conv.bias) if conv.use_bias else None
+    if bn.center:
+        moving_mean, beta = K.batch_get_value([bn.moving_mean, bn.beta])
+    else:
+        moving_mean, beta = None, None
+    if bn.scale:
+        moving_variances = K.batch_get_value([bn.moving_Vrr, bn.moving_Vii, bn.moving_Vri])
+        gammas = K.batch_get_value([bn.gamma_rr, bn.gamma_ri, bn.gamma_ii])
+    else:
+        moving_variances, gammas = None, None
+    return list(fold_weights(K.get_value(conv.kernel), bias, moving_mean, beta, moving_variances, gammas,
+                             bn_kind=bn.bn_kind))
+
+
+def fold_bn_into_conv(model, input_tensors=None):
+    """
+    Fold each `ComplexBatchNormalization` into the complex convolution layer it directly follows.
+
+    A batch normalization following a convolution with no activation in between is an affine transformation
+    of the convolution output at inference time, so the pair is replaced by a single real convolution over
+    the concatenated real and imaginary feature maps, saving a full pass over the feature map. The folded
+    model uses the moving statistics of the batch normalization layers and is meant for inference only.
+    All the other layers, and their weights, are shared with `model`.
+
+    :param model: `keras.models.Model`, a functional model, e.g. a `ResNet2D`
+
+    :param input_tensors: optional list of input tensors to build the folded model upon,
+        default creates new `keras.layers.Input` placeholders
+
+    :return model: `keras.models.Model` with the batch normalization layers folded
+
+    Usage:
+
+        >>> from complex_networks_keras_tf1.models.fold_bn import fold_bn_into_conv
+        >>> model = ResNet2D18(inputs, classes=od)
+        >>> model.load_weights(weights_path)
+        >>> folded_model = fold_bn_into_conv(model)
+    """
+    pairs = {}
+    for layer in model.layers:
+        if isinstance(layer, ComplexBatchNormalization) and len(layer._inbound_nodes) == 1:
+            conv = layer._inbound_nodes[0].inbound_layers[0]
+            if _is_foldable(conv, layer):
+                pairs[conv] = layer
+    folded_bns = set(pairs.values())
+
+    if input_tensors is None:
+        input_tensors = [keras.layers.Input(batch_shape=layer.batch_input_shape, dtype=layer.dtype, name=layer.name)
+                         for layer in model._input_layers]
+    input_tensors = to_list(input_tensors)
+
+    tensor_map = dict(zip(model.inputs, input_tensors))
+    for depth in sorted(model._nodes_by_depth.keys(), reverse=True):
+        for node in model._nodes_by_depth[depth]:
+            layer = node.outbound_layer
+            if layer in folded_bns or all(x in tensor_map for x in node.output_tensors):
+                continue
+
+            computed_tensors = [tensor_map[x] for x in node.input_tensors]
+            if len(computed_tensors) == 1:
+                computed_tensors = computed_tensors[0]
+
+            if layer in pairs:
+                bn = pairs[layer]
+                real_conv = _real_conv(layer)
+                tensor_map[bn.output] = real_conv(computed_tensors)
+                real_conv.set_weights(_folded_weights(layer, bn))
+            else:
+                kwargs = node.arguments if node.arguments else {}
+                output_tensors = to_list(layer(computed_tensors, **kwargs))
+                tensor_map.update(zip(node.output_tensors, output_tensors))
+
+    return keras.models.Model(input_tensors, [tensor_map[x] for x in model.outputs], name=model.name)
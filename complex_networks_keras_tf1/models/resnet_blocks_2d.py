@@ -16,6 +16,8 @@ import keras.regularizers
 from ..layers.activations import layer_activation
 from ..layers.bn import ComplexBatchNormalization
 from ..layers.conv import ComplexConv2D
+from .block_spec import _CHANNEL_AXIS, _DATA_FORMAT, BlockSpec
+from .fold_bn import conv_bn
 
 
 def basic_2d(filters,
@@ -25,6 +27,9 @@ def basic_2d(filters,
              numerical_name=False,
              stride=None,
              activation='crelu',
+             bn_kind='covariance',
+             compute_dtype=None,
+             inference_mode=False,
              **kwargs,
             ):
     """
@@ -45,59 +50,62 @@ def basic_2d(filters,
 
     :param activation: str, the activation of convolution layer in residual blocks
 
+    :param bn_kind: str, the standardization of the batch normalization layers, 'covariance' or 'variance'
+
+    :param compute_dtype: str, optional dtype the convolutions are computed in, e.g. 'float16'
+
+    :param inference_mode: bool, if true, builds each convolution and its batch normalization as the single real
+        convolution they fold into (see `fold_bn_into_conv`), for inference only
+
     Usage:
 
         >>> from complex_networks_keras_tf1.models.resnet_models_2d import basic_2d
 
         >>> basic_2d(64)
     """
-    if stride is None:
-        if block != 0 or stage == 0:
-            stride = 1
-        else:
-            stride = 2
+    spec = BlockSpec(stage, block, numerical_name, stride, activation)
 
-    axis = -1 if keras.backend.image_data_format() == "channels_last" else 1
-
-    if block > 0 and numerical_name:
-        block_char = f'b{block}'
-    else:
-        block_char = chr(ord('a') + block)
-
-    stage_char = str(stage + 2)
+    names = spec.names
 
     def f(inputs, **kwargs):
         """Method for block."""
-        outputs = keras.layers.ZeroPadding2D(padding=1, name=f'padding{stage_char}{block_char}_branch2a')(inputs)
-
-        outputs = ComplexConv2D(filters, kernel_size, strides=stride, use_bias=False, spectral_parametrization=False,
-                                name=f'res{stage_char}{block_char}_branch2a', **kwargs)(outputs)
-
-        outputs = ComplexBatchNormalization(
-            axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch2a')(outputs)
-
-        outputs = layer_activation(outputs, activation, name=f'res{stage_char}{block_char}_branch2a_{activation}')
+        # A stride 1 convolution pads by itself, which avoids materializing a padded copy of the feature map.
+        if spec.stride == 1:
+            outputs = inputs
+            padding = 'same'
+        else:
+            outputs = keras.layers.ZeroPadding2D(padding=1, data_format=_DATA_FORMAT, name=names['pad_a'])(inputs)
+            padding = 'valid'
 
-        outputs = keras.layers.ZeroPadding2D(padding=1, name=f'padding{stage_char}{block_char}_branch2b')(outputs)
+        outputs = conv_bn(ComplexConv2D(filters, kernel_size, strides=spec.stride, padding=padding, use_bias=False,
+                                        compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                        name=names['conv_a'], **kwargs),
+                          ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                    name=names['bn_a']),
+                          inference_mode)(outputs)
 
-        outputs = ComplexConv2D(filters, kernel_size, use_bias=False, spectral_parametrization=False,
-                                name=f'res{stage_char}{block_char}_branch2b', **kwargs)(outputs)
+        outputs = layer_activation(outputs, activation, name=names['act_a'])
 
-        outputs = ComplexBatchNormalization(
-            axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch2b')(outputs)
+        outputs = conv_bn(ComplexConv2D(filters, kernel_size, padding='same', use_bias=False,
+                                        compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                        name=names['conv_b'], **kwargs),
+                          ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                    name=names['bn_b']),
+                          inference_mode)(outputs)
 
         if block == 0:
-            shortcut = ComplexConv2D(filters, (1, 1), strides=stride, use_bias=False, spectral_parametrization=False,
-                                     name=f'res{stage_char}{block_char}_branch1', **kwargs)(inputs)
-
-            shortcut = ComplexBatchNormalization(
-                axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch1')(shortcut)
+            shortcut = conv_bn(ComplexConv2D(filters, (1, 1), strides=spec.stride, use_bias=False,
+                                             compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                             name=names['conv_1'], **kwargs),
+                               ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                         name=names['bn_1']),
+                               inference_mode)(inputs)
         else:
             shortcut = inputs
 
-        outputs = keras.layers.add([outputs, shortcut], name=f'res{stage_char}{block_char}')
+        outputs = keras.layers.add([outputs, shortcut], name=names['add'])
 
-        outputs = layer_activation(outputs, activation, name=f'res{stage_char}{block_char}_{activation}')
+        outputs = layer_activation(outputs, activation, name=names['act'])
 
         return outputs
 
@@ -111,6 +119,9 @@ def bottleneck_2d(filters,
                   numerical_name=False,
                   stride=None,
                   activation='crelu',
+                  bn_kind='covariance',
+                  compute_dtype=None,
+                  inference_mode=False,
                   **kwargs,
                  ):
     """
@@ -131,6 +142,13 @@ def bottleneck_2d(filters,
 
     :param activation: str, the activation of convolution layer in residual blocks
 
+    :param bn_kind: str, the standardization of the batch normalization layers, 'covariance' or 'variance'
+
+    :param compute_dtype: str, optional dtype the convolutions are computed in, e.g. 'float16'
+
+    :param inference_mode: bool, if true, builds each convolution and its batch normalization as the single real
+        convolution they fold into (see `fold_bn_into_conv`), for inference only
+
     Usage:
 
         >>> from complex_networks_keras_tf1.models.resnet_models_2d import bottleneck_2d
@@ -138,59 +156,50 @@ def bottleneck_2d(filters,
         >>> bottleneck_2d(64)
     """
 
-    if stride is None:
-        if block != 0 or stage == 0:
-            stride = 1
-        else:
-            stride = 2
-
-    axis = -1 if keras.backend.image_data_format() == "channels_last" else 1
-
-    if block > 0 and numerical_name:
-        block_char = f'b{block}'
-    else:
-        block_char = chr(ord('a') + block)
+    spec = BlockSpec(stage, block, numerical_name, stride, activation)
 
-    stage_char = str(stage + 2)
+    names = spec.names
 
     def f(inputs, **kwargs):
         """Method for block."""
-        outputs = ComplexConv2D(filters, 1, strides=stride, use_bias=False, spectral_parametrization=False,
-                                name=f'res{stage_char}{block_char}_branch2a', **kwargs)(inputs)
-
-        outputs = ComplexBatchNormalization(
-            axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch2a')(outputs)
-
-        outputs = layer_activation(outputs, activation, name=f'res{stage_char}{block_char}_branch2a_{activation}')
-
-        outputs = keras.layers.ZeroPadding2D(padding=1, name=f'padding{stage_char}{block_char}_branch2b')(outputs)
-
-        outputs = ComplexConv2D(filters, kernel_size, use_bias=False, spectral_parametrization=False,
-                                name=f'res{stage_char}{block_char}_branch2b', **kwargs)(outputs)
-
-        outputs = ComplexBatchNormalization(
-            axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch2b')(outputs)
-
-        outputs = layer_activation(outputs, activation, name=f'res{stage_char}{block_char}_branch2b_{activation}')
-
-        outputs = ComplexConv2D(filters*4, 1, strides=(1, 1), use_bias=False, spectral_parametrization=False,
-                                name=f'res{stage_char}{block_char}_branch2c', **kwargs)(outputs)
-
-        outputs = ComplexBatchNormalization(
-            axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch2c')(outputs)
+        outputs = conv_bn(ComplexConv2D(filters, 1, strides=spec.stride, use_bias=False,
+                                        compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                        name=names['conv_a'], **kwargs),
+                          ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                    name=names['bn_a']),
+                          inference_mode)(inputs)
+
+        outputs = layer_activation(outputs, activation, name=names['act_a'])
+
+        outputs = conv_bn(ComplexConv2D(filters, kernel_size, padding='same', use_bias=False,
+                                        compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                        name=names['conv_b'], **kwargs),
+                          ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                    name=names['bn_b']),
+                          inference_mode)(outputs)
+
+        outputs = layer_activation(outputs, activation, name=names['act_b'])
+
+        outputs = conv_bn(ComplexConv2D(filters*4, 1, strides=(1, 1), use_bias=False,
+                                        compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                        name=names['conv_c'], **kwargs),
+                          ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                    name=names['bn_c']),
+                          inference_mode)(outputs)
 
         if block == 0:
-            shortcut = ComplexConv2D(filters*4, (1, 1), strides=stride, use_bias=False, spectral_parametrization=False,
-                                     name=f'res{stage_char}{block_char}_branch1', **kwargs)(inputs)
-
-            shortcut = ComplexBatchNormalization(
-                axis=axis, epsilon=1e-5, name=f'bn{stage_char}{block_char}_branch1')(shortcut)
+            shortcut = conv_bn(ComplexConv2D(filters*4, (1, 1), strides=spec.stride, use_bias=False,
+                                             compute_dtype=compute_dtype, data_format=_DATA_FORMAT,
+                                             name=names['conv_1'], **kwargs),
+                               ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                         name=names['bn_1']),
+                               inference_mode)(inputs)
         else:
             shortcut = inputs
 
-        outputs = keras.layers.add([outputs, shortcut], name=f'res{stage_char}{block_char}')
+        outputs = keras.layers.add([outputs, shortcut], name=names['add'])
 
-        outputs = layer_activation(outputs, activation, name=f'res{stage_char}{block_char}_{activation}')
+        outputs = layer_activation(outputs, activation, name=names['act'])
 
         return outputs
 
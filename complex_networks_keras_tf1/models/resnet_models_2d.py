@@ -11,15 +11,40 @@
 # pylint:disable=dangerous-default-value, keyword-arg-before-vararg, too-many-arguments, too-many-locals
 # pylint:disable=invalid-name, too-many-branches
 
+import contextlib
 import keras
 import keras.backend as K
+import tensorflow as tf
 from ..layers.activations import layer_activation
 from ..layers.conv import ComplexConv2D
 from ..layers.dense import ComplexDense
 from ..layers.bn import ComplexBatchNormalization
 from ..layers.pool import SpectralPooling2D, ComplexMaxPooling2D, ComplexAveragePooling2D
+from .block_spec import _CHANNEL_AXIS, _DATA_FORMAT
+from .fold_bn import conv_bn
 from .resnet_blocks_2d import basic_2d, bottleneck_2d
 
+
+def _jit_scope(xla_jit):
+    """An XLA JIT scope, so that the ops built within are compiled as one cluster, or a no-op context."""
+    if xla_jit:
+        return tf.contrib.compiler.jit.experimental_jit_scope(compile_ops=True)
+    return contextlib.ExitStack()
+
+# Layers built for each name of `pooling_func`, where an unknown name means no pooling layer.
+_pool1_dict = {'max':lambda: ComplexMaxPooling2D(pool_size=(3, 3), strides=(2, 2), padding='same', name='pool1'),
+               'average':lambda: ComplexAveragePooling2D(pool_size=(3, 3), strides=(2, 2), padding='same',
+                                                         name='pool1')}
+
+_pool5_dict = {'global_average':lambda: keras.layers.GlobalAveragePooling2D(name='pool5'),
+               'complex_average':lambda: ComplexAveragePooling2D(name='pool5'),
+               'complex_max':lambda: ComplexMaxPooling2D(name='pool5'),
+               'spectral_average':lambda: SpectralPooling2D(gamma=[0.25, 0.25], name='pool5')}
+
+# Output Dense layer, keyed by whether `output_activation` starts with 'complex_'.
+_dense_dict = {True:ComplexDense,
+               False:keras.layers.Dense}
+
 class ResNet2D(keras.Model):
     """
     Constructs a `keras.models.Model` object using the given block count.
@@ -42,6 +67,26 @@ class ResNet2D(keras.Model):
 
     :param output_activation: int, activation of the output Dense layer of the classifer
 
+    :param inference_mode: bool, if true, builds each convolution and the batch normalization following it as the
+        single real convolution they fold into, i.e. the topology of `fold_bn_into_conv(model)`. No weights are
+        folded at construction time: the model is only meaningful after `load_weights` of a file saved from
+        `fold_bn_into_conv(trained_model)`, and it is meant for inference only
+
+    :param xla_jit: bool, if true, compiles the stem, the stack of residual blocks and the classifier with XLA,
+        each as a separate cluster, also with `inference_mode=True` where the folded convolutions are built within
+        their own section. Alternatively, XLA auto-clustering of the whole graph is enabled with
+        `config.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1` in the
+        `tf.ConfigProto` of the session
+
+    :param bn_kind: str, the standardization of the batch normalization layers, 'covariance' to whiten the
+        complex feature maps or 'variance' to only divide them by the standard deviation of their modulus
+
+    :param mixed_precision: bool, if true, computes the convolutions in float16 (e.g. on GPU tensor cores). Only
+        the convolution GEMMs run in reduced precision: each casts its input and kernel to float16 and its output
+        back to float32, while the weights, the batch normalizations, the activations and the classifier stay in
+        float32. Keras 2.2.4 has no loss scaling, so small float16 gradients can underflow to zero when training,
+        unless the loss is scaled manually (e.g. multiplied by a constant, with the gradients divided by it)
+
     :return model: ResNet model with encoding output (if `include_top=False`) or classification
         output (if `include_top=True`)
 
@@ -70,69 +115,99 @@ class ResNet2D(keras.Model):
                  numerical_names=None,
                  output_activation=None,
                  *args,
+                 inference_mode=False,
+                 xla_jit=False,
+                 bn_kind='covariance',
+                 mixed_precision=False,
                  **kwargs
                 ):
-        axis = -1 if keras.backend.image_data_format() == "channels_last" else 1
-
         if numerical_names is None:
             numerical_names = [True] * len(num_blocks)
 
-        x_complex = ComplexConv2D(n_filters, 7, strides=(2, 2), padding='same', use_bias=False,
-                                  spectral_parametrization=False, name='conv1')(inputs)
+        compute_dtype = 'float16' if mixed_precision else None
 
-        x_complex = ComplexBatchNormalization(axis=axis, epsilon=1e-5, name='bn_conv1')(x_complex)
+        with _jit_scope(xla_jit):
+            x_complex = conv_bn(ComplexConv2D(n_filters, 7, strides=(2, 2), padding='same', use_bias=False,
+                                              compute_dtype=compute_dtype, data_format=_DATA_FORMAT, name='conv1'),
+                                ComplexBatchNormalization(axis=_CHANNEL_AXIS, epsilon=1e-5, bn_kind=bn_kind,
+                                                          name='bn_conv1'),
+                                inference_mode)(inputs)
 
-        x_complex = layer_activation(x_complex, activation, name=f'conv1_{activation}')
+            x_complex = layer_activation(x_complex, activation, name=f'conv1_{activation}')
 
-        if pooling_func[0] == 'max':
-            x_complex = ComplexMaxPooling2D(pool_size=(3, 3), strides=(2, 2), padding='same', name='pool1')(x_complex)
-        elif pooling_func[0] == 'average':
-            x_complex = ComplexAveragePooling2D(pool_size=(3, 3), strides=(2, 2), padding='same',
-                                                name='pool1')(x_complex)
+            if pooling_func[0] in _pool1_dict:
+                x_complex = _pool1_dict[pooling_func[0]]()(x_complex)
 
-        outputs = []
+        blocks = [[block_func(n_filters * 2 ** stage_id,
+                              stage_id,
+                              block_id,
+                              numerical_name=(block_id > 0 and numerical_names[stage_id]),
+                              activation=activation,
+                              bn_kind=bn_kind,
+                              compute_dtype=compute_dtype,
+                              inference_mode=inference_mode)
+                   for block_id in range(iterations)]
+                  for stage_id, iterations in enumerate(num_blocks)]
 
-        for stage_id, iterations in enumerate(num_blocks):
-            for block_id in range(iterations):
-                x_complex = block_func(
-                    n_filters,
-                    stage_id,
-                    block_id,
-                    numerical_name=(block_id > 0 and numerical_names[stage_id]),
-                    activation=activation
-                )(x_complex)
+        outputs = []
 
-            n_filters *= 2
+        # A single jit scope, so that the residual stages are compiled as one XLA cluster.
+        with _jit_scope(xla_jit):
+            for stage_blocks in blocks:
+                for block in stage_blocks:
+                    x_complex = block(x_complex)
 
-            outputs.append(x_complex)
+                outputs.append(x_complex)
 
         if include_top:
             assert classes > 0
-            if pooling_func[1] == 'global_average':
-                x_complex = keras.layers.GlobalAveragePooling2D(name="pool5")(x_complex)
-            elif pooling_func[1] == 'complex_average':
-                x_complex = ComplexAveragePooling2D(name='pool5')(x_complex)
-            elif pooling_func[1] == 'complex_max':
-                x_complex = ComplexMaxPooling2D(name='pool5')(x_complex)
-            elif pooling_func[1] == 'spectral_average':
-                x_complex = SpectralPooling2D(gamma=[0.25, 0.25], name='pool5')(x_complex)
-
-            if output_activation is None:
-                output_activation = 'softmax'
-
-            if K.ndim(x_complex) > 2:
-                x_complex = keras.layers.Flatten()(x_complex)
-
-            if output_activation.startswith('complex_'):
-                output_activation = output_activation[len('complex_'):]
-                x = ComplexDense(classes, activation=output_activation, name=f'fc{classes}')(x_complex)
-            else:
-                x = keras.layers.Dense(classes, activation=output_activation, name=f'fc{classes}')(x_complex)
-
-            super(ResNet2D, self).__init__(inputs=inputs, outputs=x, *args, **kwargs)
+            with _jit_scope(xla_jit):
+                if pooling_func[1] in _pool5_dict:
+                    x_complex = _pool5_dict[pooling_func[1]]()(x_complex)
+
+                if output_activation is None:
+                    output_activation = 'softmax'
+
+                if K.ndim(x_complex) > 2:
+                    x_complex = keras.layers.Flatten()(x_complex)
+
+                is_complex = output_activation.startswith('complex_')
+                if is_complex:
+                    output_activation = output_activation[len('complex_'):]
+
+                x = _dense_dict[is_complex](classes, activation=output_activation, name=f'fc{classes}')(x_complex)
         else:
             # Else output each stages features
-            super(ResNet2D, self).__init__(inputs=inputs, outputs=outputs, *args, **kwargs)
+            x = outputs
+
+        super(ResNet2D, self).__init__(inputs=inputs, outputs=x, *args, **kwargs)
+
+    def quantize(self, output_file=None):
+        """
+        Converts the model to a TensorFlow Lite flat buffer with the weights quantized to 8 bits.
+
+        A complex convolution kernel is a single real tensor, which is quantized like the kernel of a real
+        convolution. The model should not depend on the learning phase, i.e. be built with `inference_mode=True`
+        (which also quantizes the folded kernels) or after `keras.backend.set_learning_phase(0)`.
+
+        :param output_file: str, optional path the flat buffer is written to
+
+        :return: bytes, the TensorFlow Lite flat buffer
+
+        Usage:
+            >>> model = ResNet2D18(inputs, classes=od, inference_mode=True)
+            >>> model.load_weights(folded_weights_path)
+            >>> model.quantize('resnet2d18.tflite')
+        """
+        converter = tf.contrib.lite.TFLiteConverter.from_session(K.get_session(), self.inputs, self.outputs)
+        converter.post_training_quantize = True
+        tflite_model = converter.convert()
+
+        if output_file is not None:
+            with open(output_file, 'wb') as f:
+                f.write(tflite_model)
+
+        return tflite_model
 
 class ResNet2D18(ResNet2D):
     """
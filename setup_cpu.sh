@@ -0,0 +1,62 @@
+#!/usr/bin/env bash
+#
+# Build and install TensorFlow from source with the SIMD extensions of this CPU (AVX, AVX2, FMA, AVX-512)
+# enabled, so that the Eigen kernels behind the complex convolutions and batch normalizations use them.
+#
+# Usage: ./setup_cpu.sh TENSORFLOW_SOURCE_DIR [PACKAGE_DIR]
+#
+#   TENSORFLOW_SOURCE_DIR  a configured (./configure) checkout of the TensorFlow release in use, e.g. r1.12
+#   PACKAGE_DIR            optional directory the built wheel is copied to
+
+set -euo pipefail
+
+TF_SRC=${1:?"Usage: $0 TENSORFLOW_SOURCE_DIR [PACKAGE_DIR]"}
+PKG_DIR=${2:-}
+
+CPU_FLAGS=$(grep -m1 '^flags' /proc/cpuinfo)
+
+COPTS=(--copt=-march=native)
+for flag in avx avx2 fma avx512f; do
+    if grep -qw "${flag}" <<< "${CPU_FLAGS}"; then
+        COPTS+=("--copt=-m${flag}")
+    fi
+done
+if grep -qw avx512_vnni <<< "${CPU_FLAGS}"; then
+    COPTS+=(--copt=-mavx512vnni)
+fi
+
+echo "Building TensorFlow with ${COPTS[*]}"
+
+# A fresh directory, so that only the wheel built here is installed.
+BUILD_DIR=$(mktemp -d)
+trap 'rm -rf "${BUILD_DIR}"' EXIT
+
+cd "${TF_SRC}"
+bazel build --config=opt "${COPTS[@]}" //tensorflow/tools/pip_package:build_pip_package
+bazel-bin/tensorflow/tools/pip_package/build_pip_package "${BUILD_DIR}"
+WHEELS=("${BUILD_DIR}"/tensorflow-*.whl)
+if [ "${#WHEELS[@]}" -ne 1 ] || [ ! -f "${WHEELS[0]}" ]; then
+    echo "Expected one TensorFlow wheel in ${BUILD_DIR}, found: ${WHEELS[*]}" >&2
+    exit 1
+fi
+
+# Back to the calling directory, which a relative PACKAGE_DIR is resolved against.
+cd - > /dev/null
+# Installs into the same interpreter the check below runs with.
+python -m pip install --upgrade "${WHEELS[0]}"
+if [ -n "${PKG_DIR}" ]; then
+    mkdir -p "${PKG_DIR}"
+    cp "${WHEELS[0]}" "${PKG_DIR}"
+fi
+
+# TensorFlow 1.x logs the instructions it was not compiled to use at the INFO level when a session starts.
+if ! TF_LOG=$(TF_CPP_MIN_LOG_LEVEL=0 python -c "import tensorflow as tf; tf.Session().close()" 2>&1); then
+    echo "${TF_LOG}" >&2
+    echo "The installed TensorFlow fails to import." >&2
+    exit 1
+fi
+if grep "not compiled to use" <<< "${TF_LOG}"; then
+    echo "TensorFlow does not use all the SIMD extensions of this CPU." >&2
+    exit 1
+fi
+echo "TensorFlow uses all the SIMD extensions of this CPU."
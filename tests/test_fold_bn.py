@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""Numerical check of the folding of complex batch normalizations into complex convolutions."""
+
+# pylint:disable=invalid-name
+
+import unittest
+
+import numpy as np
+import keras
+import keras.backend as K
+from keras.utils.generic_utils import to_list
+
+from complex_networks_keras_tf1.layers.bn import ComplexBatchNormalization
+from complex_networks_keras_tf1.models.fold_bn import MixedPrecisionConv2D, fold_bn_into_conv, fold_weights
+from complex_networks_keras_tf1.models.resnet_blocks_2d import basic_2d
+from complex_networks_keras_tf1.models.resnet_models_2d import ResNet2D
+
+
+def _conv1d(inputs, kernel):
+    """Real 'valid' convolution of `inputs` of shape `(length, in)` with `kernel` of shape `(width, in, out)`."""
+    width = kernel.shape[0]
+    return np.stack([np.einsum('wi,wio->o', inputs[t:t + width], kernel)
+                     for t in range(inputs.shape[0] - width + 1)])
+
+
+def _complex_conv1d(inputs, kernel, bias):
+    """Complex convolution, with inputs and outputs laid out as [real | imag] along the last axis."""
+    input_dim = inputs.shape[-1] // 2
+    filters = kernel.shape[-1] // 2
+    z = inputs[:, :input_dim] + 1j * inputs[:, input_dim:]
+    w = kernel[..., :filters] + 1j * kernel[..., filters:]
+    out = _conv1d(z, w)
+    return np.concatenate([out.real, out.imag], axis=-1) + bias
+
+
+def _complex_bn(inputs, moving_mean, beta, moving_variances, gammas, bn_kind):
+    """Inference transformation of a complex batch normalization, with V^(-1/2) from an eigendecomposition."""
+    filters = inputs.shape[-1] // 2
+    centred = inputs - moving_mean
+    Vrr, Vii, Vri = moving_variances
+    gamma_rr, gamma_ri, gamma_ii = gammas
+    outputs = np.empty_like(inputs)
+    for c in range(filters):
+        if bn_kind == 'variance':
+            inverse_sqrt = np.eye(2) / np.sqrt((Vrr[c] + Vii[c]) / 2)
+        else:
+            eigenvalues, eigenvectors = np.linalg.eigh(np.array([[Vrr[c], Vri[c]], [Vri[c], Vii[c]]]))
+            inverse_sqrt = eigenvectors @ np.diag(eigenvalues ** -0.5) @ eigenvectors.T
+        gamma = np.array([[gamma_rr[c], gamma_ri[c]], [gamma_ri[c], gamma_ii[c]]])
+        pair = np.stack([centred[:, c], centred[:, filters + c]])
+        pair = gamma @ inverse_sqrt @ pair
+        outputs[:, c], outputs[:, filters + c] = pair
+    return outputs + beta
+
+
+class TestFoldWeights(unittest.TestCase):
+    """The folded real convolution matches the complex convolution followed by the batch normalization."""
+
+    def _check(self, bn_kind):
+        rng = np.random.RandomState(0)
+        input_dim, filters, width, length = 3, 4, 3, 9
+
+        inputs = rng.randn(length, 2 * input_dim)
+        kernel = rng.randn(width, input_dim, 2 * filters)
+        bias = rng.randn(2 * filters)
+        moving_mean = rng.randn(2 * filters)
+        beta = rng.randn(2 * filters)
+        Vrr = rng.uniform(0.5, 2.0, filters)
+        Vii = rng.uniform(0.5, 2.0, filters)
+        # |Vri| < sqrt(Vrr * Vii), so that the covariance matrices are positive definite.
+        Vri = rng.uniform(-0.9, 0.9, filters) * np.sqrt(Vrr * Vii)
+        gammas = (rng.randn(filters), rng.randn(filters), rng.randn(filters))
+
+        expected = _complex_bn(_complex_conv1d(inputs, kernel, bias), moving_mean, beta, (Vrr, Vii, Vri), gammas,
+                               bn_kind)
+
+        folded_kernel, folded_bias = fold_weights(kernel, bias, moving_mean, beta, (Vrr, Vii, Vri), gammas,
+                                                  bn_kind=bn_kind)
+        self.assertEqual(folded_kernel.shape, (width, 2 * input_dim, 2 * filters))
+        np.testing.assert_allclose(_conv1d(inputs, folded_kernel) + folded_bias, expected, rtol=1e-10, atol=1e-10)
+
+    def test_covariance(self):
+        self._check('covariance')
+
+    def test_variance(self):
+        self._check('variance')
+
+
+def _randomize_bn(model, rng):
+    """Set random, positive definite moving statistics and random scales and shifts in the batch normalizations."""
+    for layer in model.layers:
+        if not isinstance(layer, ComplexBatchNormalization):
+            continue
+        filters = K.int_shape(layer.moving_Vrr)[0]
+        Vrr = rng.uniform(0.5, 2.0, filters)
+        Vii = rng.uniform(0.5, 2.0, filters)
+        Vri = rng.uniform(-0.9, 0.9, filters) * np.sqrt(Vrr * Vii)
+        K.batch_set_value([(layer.moving_mean, 0.1 * rng.randn(2 * filters)),
+                           (layer.beta, 0.1 * rng.randn(2 * filters)),
+                           (layer.moving_Vrr, Vrr),
+                           (layer.moving_Vii, Vii),
+                           (layer.moving_Vri, Vri),
+                           (layer.gamma_rr, rng.uniform(0.5, 1.5, filters)),
+                           (layer.gamma_ii, rng.uniform(0.5, 1.5, filters)),
+                           (layer.gamma_ri, 0.2 * rng.randn(filters))])
+
+
+class TestFoldBnIntoConv(unittest.TestCase):
+    """The folded model predicts as the model it is folded from, at inference."""
+
+    def setUp(self):
+        K.clear_session()
+        K.set_learning_phase(0)
+
+    def tearDown(self):
+        K.clear_session()
+
+    @staticmethod
+    def _resnet(**kwargs):
+        inputs = keras.layers.Input(shape=(32, 32, 2))
+        return ResNet2D(inputs, [1, 1], basic_2d, n_filters=4, classes=3, **kwargs)
+
+    def _check(self, bn_kind='covariance', include_top=True, mixed_precision=False, tolerance=1e-4):
+        rng = np.random.RandomState(0)
+        model = self._resnet(bn_kind=bn_kind, include_top=include_top, mixed_precision=mixed_precision)
+        _randomize_bn(model, rng)
+        x = rng.randn(2, 32, 32, 2)
+        expected = to_list(model.predict(x))
+
+        folded = fold_bn_into_conv(model)
+        self.assertFalse([layer.name for layer in folded.layers if isinstance(layer, ComplexBatchNormalization)])
+        if mixed_precision:
+            self.assertTrue(any(isinstance(layer, MixedPrecisionConv2D) for layer in folded.layers))
+        for output, expected_output in zip(to_list(folded.predict(x)), expected):
+            np.testing.assert_allclose(output, expected_output, rtol=tolerance, atol=tolerance)
+
+        # The model built in inference mode has the topology of the folded model and loads its weights.
+        direct = self._resnet(bn_kind=bn_kind, include_top=include_top, mixed_precision=mixed_precision,
+                              inference_mode=True)
+        self.assertFalse([layer.name for layer in direct.layers if isinstance(layer, ComplexBatchNormalization)])
+        self.assertEqual(K.int_shape(direct.get_layer('res2a').output), K.int_shape(model.get_layer('res2a').output))
+        direct.set_weights(folded.get_weights())
+        for output, expected_output in zip(to_list(direct.predict(x)), expected):
+            np.testing.assert_allclose(output, expected_output, rtol=tolerance, atol=tolerance)
+
+    def test_covariance(self):
+        self._check('covariance')
+
+    def test_variance(self):
+        self._check('variance')
+
+    def test_without_top(self):
+        self._check(include_top=False)
+
+    def test_mixed_precision(self):
+        self._check(mixed_precision=True, tolerance=1e-2)
+
+
+if __name__ == '__main__':
+    unittest.main()
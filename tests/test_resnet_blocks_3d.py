@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""Parity of the three-dimensional residual blocks with explicit zero padding."""
+
+# pylint:disable=invalid-name
+
+import unittest
+
+import numpy as np
+import keras
+import keras.backend as K
+
+from complex_networks_keras_tf1.layers.activations import layer_activation
+from complex_networks_keras_tf1.layers.bn import ComplexBatchNormalization
+from complex_networks_keras_tf1.layers.conv import ComplexConv3D
+from complex_networks_keras_tf1.models.block_spec import BlockSpec
+from complex_networks_keras_tf1.models.resnet_blocks_3d import basic_3d, bottleneck_3d
+
+
+def _padded_block(inputs, filters, stride, bottleneck, names, activation='crelu'):
+    """A block with every 3x3x3 convolution after a `ZeroPadding3D(1)` and with 'valid' padding."""
+    def conv_bn(x, n_filters, kernel_size, key, strides=1):
+        if kernel_size > 1:
+            x = keras.layers.ZeroPadding3D(padding=1)(x)
+        x = ComplexConv3D(n_filters, kernel_size, strides=strides, padding='valid', use_bias=False,
+                          name=names[f'conv_{key}'])(x)
+        return ComplexBatchNormalization(axis=-1, epsilon=1e-5, name=names[f'bn_{key}'])(x)
+
+    if bottleneck:
+        x = layer_activation(conv_bn(inputs, filters, 1, 'a', strides=stride), activation)
+        x = layer_activation(conv_bn(x, filters, 3, 'b'), activation)
+        x = conv_bn(x, 4 * filters, 1, 'c')
+        shortcut = conv_bn(inputs, 4 * filters, 1, '1', strides=stride)
+    else:
+        x = layer_activation(conv_bn(inputs, filters, 3, 'a', strides=stride), activation)
+        x = conv_bn(x, filters, 3, 'b')
+        shortcut = conv_bn(inputs, filters, 1, '1', strides=stride)
+    return layer_activation(keras.layers.add([x, shortcut]), activation)
+
+
+class TestResNetBlocks3D(unittest.TestCase):
+    """The blocks compute the same outputs as with explicit zero padding, with the same weights."""
+
+    def setUp(self):
+        K.clear_session()
+        K.set_learning_phase(0)
+
+    def tearDown(self):
+        K.clear_session()
+
+    def _check(self, block_func, bottleneck):
+        filters = 4
+        rng = np.random.RandomState(0)
+        for stride in (1, 2):
+            for spatial_shape in ((8, 8, 8), (7, 8, 9)):
+                with self.subTest(stride=stride, spatial_shape=spatial_shape):
+                    inputs = keras.layers.Input(shape=spatial_shape + (2 * filters,))
+                    model = keras.models.Model(inputs, block_func(filters, stage=1, block=0, stride=stride)(inputs))
+
+                    names = BlockSpec(stage=1, block=0, stride=stride).names
+                    reference = keras.models.Model(inputs, _padded_block(inputs, filters, stride, bottleneck, names))
+                    for layer in model.layers:
+                        if layer.weights:
+                            reference.get_layer(layer.name).set_weights(layer.get_weights())
+
+                    x = rng.randn(2, *spatial_shape, 2 * filters)
+                    np.testing.assert_allclose(model.predict(x), reference.predict(x), rtol=1e-5, atol=1e-5)
+
+    def test_basic_3d(self):
+        self._check(basic_3d, bottleneck=False)
+
+    def test_bottleneck_3d(self):
+        self._check(bottleneck_3d, bottleneck=True)
+
+
+if __name__ == '__main__':
+    unittest.main()